@@ -1,6 +1,8 @@
 import os
 import requests
 import re
+import sys
+import calendar
 from urllib.parse import quote
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
@@ -8,6 +10,12 @@ from bs4 import BeautifulSoup
 from fastapi import FastAPI, Query
 from fastapi.middleware.cors import CORSMiddleware
 
+# 업데이트 스크립트와 검색/파싱 로직 공유
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from search_index import search_titles
+from archive_reader import read_json
+from realtime_stream import TicketTableParser, iter_ticket_rows, response_chunks
+
 app = FastAPI()
 
 app.add_middleware(
@@ -26,6 +34,12 @@ KOBIS_DAILY_URL = "https://www.kobis.or.kr/kobisopenapi/webservice/rest/boxoffic
 KOBIS_DETAIL_URL = "https://www.kobis.or.kr/kobisopenapi/webservice/rest/movie/searchMovieInfo.json"
 KOBIS_REALTIME_URL = "https://www.kobis.or.kr/kobis/business/stat/boxs/findRealTicketList.do"
 
+PUBLIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "public")
+ROLLUP_DIR = os.path.join(PUBLIC_DIR, "rollups")
+SEARCH_INDEX_PATH = os.path.join(PUBLIC_DIR, "search_index.json")
+# scripts/update_daily.py의 ROLLUP_PERIODS와 같게 유지 (크론 스크립트를 함수에 번들하지 않기 위해 따로 둠)
+ROLLUP_PERIODS = ["week", "weekend", "month"]
+
 @app.get("/api/news")
 def get_news(keyword: str = ""):
     if not keyword: return {"items": []}
@@ -141,44 +155,117 @@ def trend(movieCd: str = Query(...), openDt: str = Query(None)):
         results = list(ex.map(fetch, dates))
     return sorted([r for r in results if r], key=lambda x: x['date'])
 
+def load_rollup(period, key):
+    # 응답용으로 필드를 덧붙이므로 캐시 공유 없이 읽음
+    try: return read_json(os.path.join(ROLLUP_DIR, period, f"{key}.json"), cache=False)
+    except: return None
+
+def rollup_offset(period, date_str):
+    # 버킷 시작일로부터 며칠째인지 (주간: 월요일, 주말: 금요일, 월간: 1일 기준)
+    d = datetime.strptime(date_str, "%Y%m%d")
+    if period == "week": return d.weekday()
+    if period == "weekend": return d.weekday() - 4
+    return d.day - 1
+
+def previous_rollup_key(period, key):
+    # 달력상 직전 기간의 키 (주간: ISO 주 - 1, 주말: 금요일 - 7일, 월간: 전월)
+    if period == "week":
+        monday = datetime.strptime(f"{key}-1", "%G-W%V-%u")
+        iso_year, iso_week, _ = (monday - timedelta(days=7)).isocalendar()
+        return f"{iso_year}-W{iso_week:02d}"
+    if period == "weekend":
+        return (datetime.strptime(key, "%Y%m%d") - timedelta(days=7)).strftime("%Y%m%d")
+    year, month = int(key[:4]), int(key[4:6])
+    return f"{year - 1}12" if month == 1 else f"{year}{month - 1:02d}"
+
+def rollup_length(period, key):
+    if period == "week": return 7
+    if period == "weekend": return 3
+    return calendar.monthrange(int(key[:4]), int(key[4:6]))[1]
+
+@app.get("/api/rollup")
+def get_rollup(period: str = "week", key: str = ""):
+    """
+    update_daily.py가 미리 집계해둔 주간/주말/월간 박스오피스를 반환합니다.
+    key를 생략하면 최신 버킷을 반환하며, 진행 중인 버킷은 partial로 표시됩니다.
+    previous는 달력상 직전 기간 버킷에서 현재 버킷과 같은 경과일(예: 월~수)만 합산해 비교하며,
+    직전 기간이 아카이브에 없으면 더 이전 버킷과 비교하지 않고 comparable: false로 표시합니다.
+    """
+    if period not in ROLLUP_PERIODS: return {"error": "Invalid period"}
+    try: keys = read_json(os.path.join(ROLLUP_DIR, "index.json")).get(period, [])
+    except: keys = []
+    if not keys: return {"error": "No rollups", "period": period}
+
+    if not key: key = keys[-1]
+    if key not in keys: return {"error": "Not found", "period": period, "key": key}
+    bucket = load_rollup(period, key)
+    if not bucket: return {"error": "Not found", "period": period, "key": key}
+
+    daily = bucket.pop("daily", {})
+    bucket["days"] = len(bucket["dates"])
+    bucket["periodDays"] = rollup_length(period, key)
+    bucket["partial"] = bucket["days"] < bucket["periodDays"]
+
+    try: prev_key = previous_rollup_key(period, key)
+    except: prev_key = ""
+    prev = load_rollup(period, prev_key) if prev_key in keys else None
+    offsets = {rollup_offset(period, d) for d in daily}
+    prev_days = [day for d, day in (prev or {}).get("daily", {}).items() if rollup_offset(period, d) in offsets]
+    prev_market = {f: sum(day["market"][f] for day in prev_days) for f in ("audiCnt", "salesAmt", "showCnt")}
+    prev_audi = {}
+    for day in prev_days:
+        for movie_cd, m in day["movies"].items():
+            prev_audi[movie_cd] = prev_audi.get(movie_cd, 0) + m["audiCnt"]
+    # 직전 기간 버킷이 있고 같은 경과일 데이터가 모두 있어야 증감을 계산 (아니면 None)
+    comparable = prev is not None and len(prev_days) == bucket["days"]
+    for m in bucket["movies"]:
+        m["audiInten"] = m["audiCnt"] - prev_audi.get(m["movieCd"], 0) if comparable else None
+    bucket["previous"] = {
+        "key": prev_key,
+        "days": len(prev_days),
+        "comparable": comparable,
+        "market": prev_market if prev else None,
+        "audiInten": bucket["market"]["audiCnt"] - prev_market["audiCnt"] if comparable else None
+    }
+    return bucket
+
+@app.get("/api/search")
+def search(q: str = "", limit: int = 10):
+    if not q: return {"items": []}
+    try:
+        # 인덱스 파일은 mtime이 바뀔 때만 다시 파싱됨 (archive_reader 캐시)
+        index = read_json(SEARCH_INDEX_PATH)
+        return {"items": search_titles(index, q, min(max(limit, 1), 50))}
+    except: return {"items": []}
+
 @app.get("/api/realtime")
 def get_realtime(): return {"status": "ok", "data": []}
 
 @app.get("/api/reservation")
 def get_reservation(movieName: str = Query(...)):
     try:
-        res = requests.get(KOBIS_REALTIME_URL, headers={'User-Agent': 'Mozilla/5.0'}, timeout=5)
-        soup = BeautifulSoup(res.text, 'html.parser')
-        
-        crawled_time = ""
-        try:
-            match = re.search(r"조회일시\s*:\s*(\d{4}[./-]\d{2}[./-]\d{2}\s+\d{2}:\d{2})", soup.get_text())
-            if match: crawled_time = match.group(1).replace("/", "-")
-        except: pass
-        if not crawled_time: crawled_time = datetime.now().strftime("%Y-%m-%d %H:%M")
-
         q = re.sub(r'\s+', '', movieName).lower()
-        rows = soup.find_all("tr")
+        parser = TicketTableParser()
         
-        for row in rows:
-            cols = row.find_all("td")
-            if len(cols) < 8: continue
-            title = cols[1].get_text(strip=True)
-            norm_title = re.sub(r'\s+', '', title).lower()
-            
-            if q in norm_title or norm_title in q:
-                return {
-                    "found": True, 
-                    "data": {
-                        "rank": cols[0].get_text(strip=True),
-                        "rate": cols[3].get_text(strip=True),
-                        "audiCnt": cols[6].get_text(strip=True),
-                        "salesAmt": cols[4].get_text(strip=True),
-                        "audiAcc": cols[7].get_text(strip=True),
-                        "salesAcc": cols[5].get_text(strip=True),
+        # 스트리밍으로 읽다가 찾으면 바로 중단 (나머지 응답은 받지 않음)
+        with requests.get(KOBIS_REALTIME_URL, headers={'User-Agent': 'Mozilla/5.0'}, timeout=5, stream=True) as res:
+            for row in iter_ticket_rows(response_chunks(res), parser):
+                norm_title = re.sub(r'\s+', '', row["title"]).lower()
+                
+                if q in norm_title or norm_title in q:
+                    crawled_time = parser.crawled_time or datetime.now().strftime("%Y-%m-%d %H:%M")
+                    return {
+                        "found": True, 
+                        "data": {
+                            "rank": row["rank"],
+                            "rate": row["rate"],
+                            "audiCnt": row["audiCnt"],
+                            "salesAmt": row["salesAmt"],
+                            "audiAcc": row["audiAcc"],
+                            "salesAcc": row["salesAcc"],
+                            "crawledTime": crawled_time
+                        },
                         "crawledTime": crawled_time
-                    },
-                    "crawledTime": crawled_time
-                }
+                    }
         return {"found": False}
     except: return {"found": False}
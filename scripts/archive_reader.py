@@ -0,0 +1,148 @@
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# orjson이 설치되어 있으면 사용 (표준 json 대비 2배 이상 빠름), 없으면 표준 json
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# --- [설정] ---
+ARCHIVE_ROOT = "public/archive"
+MAX_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+# 파싱 결과를 프로세스 간에 주고받는 비용이 있어, 코어가 여러 개이고 파일이 많을 때만 프로세스 풀 사용
+PROCESS_MIN_FILES = 200
+
+# 경로 -> (mtime_ns, size, 데이터)
+_cache = {}
+_cache_lock = threading.Lock()
+
+def _parse_file(path):
+    with open(path, 'rb') as f:
+        return _loads(f.read())
+
+def _safe_parse_file(path):
+    # 프로세스 풀에서도 호출되므로 모듈 최상위 함수여야 함
+    try: return _parse_file(path)
+    except: return None
+
+def _file_key(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+def _pool_class(mode, n_files):
+    # orjson/json 파싱은 GIL을 잡고 있어 스레드로는 코어를 나눠 쓰지 못하므로,
+    # 코어가 여러 개이고 파일이 많으면 프로세스 풀 사용
+    if mode == "auto":
+        mode = "process" if (os.cpu_count() or 1) > 1 and n_files >= PROCESS_MIN_FILES else "thread"
+    return ProcessPoolExecutor if mode == "process" else ThreadPoolExecutor
+
+def read_json(path, cache=True):
+    """
+    JSON 파일 하나를 읽습니다. 파일이 바뀌지 않았으면(mtime/크기 동일) 캐시된 결과를 돌려줍니다.
+    캐시된 객체는 호출한 곳끼리 공유되므로 수정이 필요하면 cache=False로 읽으세요.
+    """
+    key = _file_key(path)
+    if cache:
+        hit = _cache.get(path)
+        if hit and hit[:2] == key: return hit[2]
+    data = _parse_file(path)
+    if cache:
+        with _cache_lock: _cache[path] = (key[0], key[1], data)
+    return data
+
+def list_archive(kind="movie", root=ARCHIVE_ROOT):
+    """
+    아카이브 파일 목록을 한 번에 훑어 {YYYYMMDD: 경로}로 반환합니다.
+    movie: archive/YYYY/MM/YYYYMMDD.json, drama: archive/drama/YYYYMMDD.json
+    """
+    dates = {}
+    if kind == "drama":
+        dirs = [os.path.join(root, "drama")]
+    else:
+        dirs = []
+        if os.path.isdir(root):
+            for year in os.scandir(root):
+                if not (year.is_dir() and len(year.name) == 4 and year.name.isdigit()): continue
+                dirs += [m.path for m in os.scandir(year.path) if m.is_dir()]
+
+    for d in dirs:
+        if not os.path.isdir(d): continue
+        for entry in os.scandir(d):
+            name = entry.name
+            if len(name) == 13 and name.endswith(".json") and name[:8].isdigit():
+                dates[name[:8]] = entry.path
+    return dates
+
+def load_many(paths, mode="auto", workers=None, cache=True):
+    """
+    여러 파일을 병렬로 읽어 입력 순서대로 반환합니다. (읽기 실패한 파일은 None)
+    mode: "auto" | "thread" | "process"
+    cache=False면 read_json과 같이 캐시를 보지도, 남기지도 않고 항상 새로 읽습니다.
+    """
+    results = [None] * len(paths)
+    missing = []
+    for i, path in enumerate(paths):
+        try:
+            key = _file_key(path)
+        except OSError:
+            continue
+        hit = _cache.get(path) if cache else None
+        if hit and hit[:2] == key: results[i] = hit[2]
+        else: missing.append((i, path, key))
+    if not missing: return results
+
+    workers = workers or MAX_WORKERS
+    # chunksize는 프로세스 풀에서만 의미가 있음 (스레드 풀은 무시)
+    chunk = max(1, len(missing) // (workers * 4))
+    with _pool_class(mode, len(missing))(max_workers=workers) as ex:
+        parsed = ex.map(_safe_parse_file, [p for _, p, _ in missing], chunksize=chunk)
+        for (i, path, key), data in zip(missing, parsed):
+            results[i] = data
+            if cache and data is not None:
+                with _cache_lock: _cache[path] = (key[0], key[1], data)
+    return results
+
+def iter_archive(kind="movie", start=None, end=None, root=ARCHIVE_ROOT, batch=None, mode="auto", cache=False):
+    """
+    (날짜, 데이터)를 날짜순으로 하나씩 돌려주는 제너레이터.
+    풀은 전체 날짜 수로 한 번 정해 끝까지 재사용하고, batch 개씩 ex.map으로 넘겨
+    앞 묶음을 넘기는 동안 다음 묶음을 미리 읽습니다. 메모리에는 최대 두 묶음만 올라갑니다.
+    (그래서 기본값은 캐시에 남기지 않음)
+    """
+    archive = list_archive(kind, root)
+    dates = sorted(d for d in archive if (not start or d >= start) and (not end or d <= end))
+    if not dates: return
+    workers = MAX_WORKERS
+    batch = batch or workers * 32
+    chunk = max(1, batch // (workers * 4))
+
+    with _pool_class(mode, len(dates))(max_workers=workers) as ex:
+        def submit(part):
+            # 캐시에 있는 파일은 풀로 보내지 않음
+            items, todo = [], []
+            for d in part:
+                path = archive[d]
+                try: key = _file_key(path)
+                except OSError: continue
+                hit = _cache.get(path) if cache else None
+                if hit and hit[:2] == key: items.append((d, path, key, hit[2]))
+                else:
+                    items.append((d, path, key, None))
+                    todo.append(path)
+            return items, ex.map(_safe_parse_file, todo, chunksize=chunk)
+
+        parts = [dates[i:i + batch] for i in range(0, len(dates), batch)]
+        pending = submit(parts[0])
+        for n in range(len(parts)):
+            items, parsed = pending
+            if n + 1 < len(parts): pending = submit(parts[n + 1])
+            for d, path, key, data in items:
+                if data is None:
+                    data = next(parsed)
+                    if cache and data is not None:
+                        with _cache_lock: _cache[path] = (key[0], key[1], data)
+                if data is not None: yield d, data
@@ -0,0 +1,94 @@
+"""
+KOBIS 실시간 예매율 응답 파싱 벤치마크 (BeautifulSoup 전체 파싱 vs 스트리밍)
+
+  python scripts/bench_realtime_stream.py                   # 가상 응답 20,000행 생성 후 비교
+  python scripts/bench_realtime_stream.py --file saved.html # 저장해둔 실제 응답으로 비교
+
+각 방식은 별도 프로세스에서 실행해 최대 RSS(ru_maxrss)가 서로 섞이지 않도록 합니다.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import resource
+import argparse
+import subprocess
+import tempfile
+
+ROW_TEMPLATE = (
+    '<tr>\n  <td>{rank}</td>\n'
+    '  <td class="tal"><a href="#" onclick="mstView(\'movie\',\'{code}\');return false;" title="테스트 영화 {rank}">테스트 영화 {rank}</a></td>\n'
+    '  <td>2026-01-{day:02d}</td>\n  <td>{rate}%</td>\n  <td>{sales:,}</td>\n  <td>{sales_acc:,}</td>\n'
+    '  <td>{audi:,}</td>\n  <td>{audi_acc:,}</td>\n</tr>\n'
+)
+
+def make_response(path, n_rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<html><body><div class="rst_sch">조회일시 : 2026/01/28 07:00</div>\n')
+        f.write('<table class="tbl_comm"><tbody>\n')
+        for i in range(1, n_rows + 1):
+            f.write(ROW_TEMPLATE.format(
+                rank=i, code=20240000 + i, day=i % 28 + 1, rate=round(100 / (i + 1), 1),
+                sales=i * 1000, sales_acc=i * 90000, audi=i * 10, audi_acc=i * 900
+            ))
+        f.write('</tbody></table></body></html>\n')
+
+def run_soup(path):
+    from bs4 import BeautifulSoup
+    with open(path, 'r', encoding='utf-8') as f: text = f.read()
+    soup = BeautifulSoup(text, 'html.parser')
+    match = re.search(r"조회일시\s*:\s*(\d{4}[./-]\d{2}[./-]\d{2}\s+\d{2}:\d{2})", soup.get_text())
+    count = 0
+    for row in soup.find_all("tr"):
+        cols = row.find_all("td")
+        if len(cols) < 8: continue
+        if cols[0].get_text(strip=True).isdigit(): count += 1
+    return count, match.group(1).replace("/", "-") if match else ""
+
+def run_stream(path):
+    from realtime_stream import TicketTableParser, iter_ticket_rows, CHUNK_SIZE
+    def chunks():
+        with open(path, 'r', encoding='utf-8') as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk: break
+                yield chunk
+    parser = TicketTableParser()
+    count = sum(1 for row in iter_ticket_rows(chunks(), parser) if row["rank"].isdigit())
+    return count, parser.crawled_time
+
+def worker(mode, path):
+    start = time.perf_counter()
+    count, crawled_time = (run_soup if mode == "soup" else run_stream)(path)
+    elapsed = time.perf_counter() - start
+    # Linux 기준 ru_maxrss 단위는 KB
+    print(json.dumps({
+        "mode": mode, "rows": count, "crawledTime": crawled_time, "seconds": round(elapsed, 3),
+        "maxRssMb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--file", help="저장된 KOBIS 응답 HTML")
+    ap.add_argument("--rows", type=int, default=20000, help="가상 응답 행 수 (--file 미지정 시)")
+    ap.add_argument("--worker", choices=["soup", "stream"], help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker: return worker(args.worker, args.file)
+
+    path = args.file
+    if not path:
+        path = os.path.join(tempfile.mkdtemp(), "realtime.html")
+        make_response(path, args.rows)
+    print(f"Input: {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+
+    for mode in ["soup", "stream"]:
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", mode, "--file", path],
+                             capture_output=True, text=True, check=True).stdout
+        r = json.loads(out)
+        print(f"  {r['mode']:<7} rows={r['rows']:<7} time={r['seconds']:>7.3f}s  peakRSS={r['maxRssMb']:>7.1f}MB  ({r['crawledTime']})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import os
+import json
+from archive_reader import iter_archive
+from update_drama import (
+    MAIN_FILE, INDEX_DIR, load_index, save_index, shard_path,
+    index_daily, index_rankings, index_weekly, week_start, is_data_complete
+)
+
+WEEKLY_SERIES = ["weekly_nationwide", "weekly_capital"]
+
+def build_drama_index():
+    """
+    기존 드라마 아카이브 전체를 읽어 시청률 인덱스를 새로 만듭니다.
+    (최초 1회 또는 인덱스가 손상되었을 때 실행)
+    """
+    print("Building drama ratings index from archive...")
+
+    # 기존 인덱스의 주간 시리즈는 아카이브에 없으므로 보존 (주 시작일 기준으로 정리)
+    # 기존 파일은 새 인덱스를 모두 쓴 뒤에 지우므로, 도중에 실패해도 주간 기록이 남음
+    index = load_index()
+    index["dates"] = []
+    old_files = []
+    if os.path.isdir(INDEX_DIR):
+        for name in sorted(os.listdir(INDEX_DIR)):
+            if name == "meta.json" or not name.endswith(".json"): continue
+            path = os.path.join(INDEX_DIR, name)
+            old_files.append(path)
+            try:
+                with open(path, 'r', encoding='utf-8') as f: old = json.load(f)
+            except: continue
+            key = old.get("title")
+            if not key: continue
+            # 기존 파일 내용을 다시 읽지 않도록 빈 항목을 먼저 등록 (get_entry가 디스크를 보지 않음)
+            entry = index["titles"].setdefault(key, {"title": key})
+            for series in WEEKLY_SERIES:
+                for d_str, val in old.get(series, {}).items():
+                    entry.setdefault(series, {})[week_start(d_str)] = val
+            if any(series in entry for series in WEEKLY_SERIES): index["dirty"].add(key)
+
+    for file_date, daily_json in iter_archive("drama"):
+        # 지상파만 있는 불완전 데이터는 시계열에는 넣되, 수집 범위 안이면
+        # 다시 받아오도록 완료 날짜 목록(dates)에서는 제외
+        d_str = daily_json.get("date") or file_date
+        if not is_data_complete(daily_json.get("nationwide", [])):
+            print(f"  [Partial] {file_date} (incomplete)")
+            index_rankings(index, d_str, daily_json.get("nationwide"), "nationwide")
+            index_rankings(index, d_str, daily_json.get("capital"), "capital")
+            continue
+        daily_json["date"] = d_str
+        index_daily(index, daily_json)
+
+    # 메인 파일의 최신 주간 랭킹 반영
+    if os.path.exists(MAIN_FILE):
+        try:
+            with open(MAIN_FILE, 'r', encoding='utf-8') as f: main_json = json.load(f)
+            d_str = main_json.get("date")
+            if d_str:
+                index_weekly(index, d_str, main_json.get("weekly_nationwide"), main_json.get("weekly_capital"))
+        except: pass
+
+    keep = {shard_path(key) for key in index["dirty"]}
+    n_titles = len(keep)
+    save_index(index)
+    # 새 인덱스에 없는 예전 파일만 정리
+    for path in old_files:
+        if path not in keep: os.remove(path)
+    print(f"✅ Indexed {len(index['dates'])} recent days, {n_titles} titles.")
+
+if __name__ == "__main__":
+    build_drama_index()
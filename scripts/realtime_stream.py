@@ -0,0 +1,121 @@
+import re
+from collections import deque
+from html.parser import HTMLParser
+
+# JavaScript 함수 mstView('movie', '20231234') 에서 코드 추출용
+MSTVIEW_REGEX = re.compile(r"mstView\s*\(\s*['\"]movie['\"]\s*,\s*['\"]([0-9]+)['\"]\s*\)")
+CRAWLED_TIME_REGEX = re.compile(r"조회일시\s*:\s*(\d{4}[./-]\d{2}[./-]\d{2}\s+\d{2}:\d{2})")
+CHUNK_SIZE = 16 * 1024
+
+# 표 컬럼 위치 (순위, 제목, 개봉일, 예매율, 예매매출액, 누적매출액, 예매관객수, 누적관객수)
+ROW_FIELDS = {"rank": 0, "rate": 3, "salesAmt": 4, "salesAcc": 5, "audiCnt": 6, "audiAcc": 7}
+
+class TicketTableParser(HTMLParser):
+    """
+    KOBIS 실시간 예매율 페이지를 조각 단위로 받아 파싱합니다.
+    전체 트리를 만들지 않고 <tr>이 닫힐 때마다 행을 rows 큐에 넣으며,
+    같은 패스에서 조회일시와 movieCd도 추출합니다.
+    </tr>이 생략된 행은 다음 <tr>, </table>, close()에서 닫습니다. (BeautifulSoup과 동일)
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = deque()
+        self.crawled_time = ""
+        self._cells = None
+        self._text = None
+        self._buf = []
+        self._movie_cd = ""
+        self._link_title = ""
+        self._link_text = None
+        self._tail = ""
+
+    def _flush(self):
+        # BeautifulSoup get_text(strip=True)와 같게 문자열 노드 단위로 공백 제거
+        text = "".join(self._buf).strip()
+        if text:
+            self._text.append(text)
+            if self._link_text is not None: self._link_text.append(text)
+        self._buf = []
+
+    def handle_starttag(self, tag, attrs):
+        if self._text is not None: self._flush()
+        if tag == "tr":
+            self._end_row()
+            self._cells, self._movie_cd, self._link_title = [], "", ""
+            self._text = None
+        elif tag == "td" and self._cells is not None:
+            self._close_cell()
+            self._text = []
+        elif tag == "a" and self._cells is not None and not self._movie_cd:
+            attrs = dict(attrs)
+            match = MSTVIEW_REGEX.search(attrs.get("onclick") or "")
+            if match:
+                self._movie_cd = match.group(1)
+                self._link_title = (attrs.get("title") or "").strip()
+                # title 속성이 없으면 링크 글자를 제목으로 사용하므로 </a>까지 수집
+                if not self._link_title: self._link_text = []
+
+    def handle_endtag(self, tag):
+        if self._text is not None: self._flush()
+        if tag == "td":
+            self._close_cell()
+        elif tag == "a" and self._link_text is not None:
+            self._link_title = "".join(self._link_text)
+            self._link_text = None
+        elif tag in ("tr", "table"):
+            self._end_row()
+
+    def close(self):
+        super().close()
+        if self._text is not None: self._flush()
+        self._end_row()
+
+    def _end_row(self):
+        if self._cells is None: return
+        self._close_cell()
+        if self._link_text is not None:
+            self._link_title = "".join(self._link_text)
+            self._link_text = None
+        self._emit()
+        self._cells = None
+
+    def _close_cell(self):
+        # </td>가 생략된 경우도 다음 <td>나 </tr>에서 셀을 닫음
+        if self._text is None: return
+        self._cells.append("".join(self._text))
+        self._text = None
+
+    def handle_data(self, data):
+        if self._text is not None: self._buf.append(data)
+        # 조회일시가 조각 경계에 걸릴 수 있어 직전 텍스트 일부를 이어 붙여 검사
+        if not self.crawled_time:
+            self._tail = (self._tail + data)[-200:]
+            match = CRAWLED_TIME_REGEX.search(self._tail)
+            if match: self.crawled_time = match.group(1).replace("/", "-")
+
+    def _emit(self):
+        cols = self._cells
+        if len(cols) < 8: return
+        row = {key: cols[i] for key, i in ROW_FIELDS.items()}
+        row["title"] = self._link_title or cols[1]
+        row["movieCd"] = self._movie_cd
+        self.rows.append(row)
+
+def iter_ticket_rows(chunks, parser=None):
+    """
+    HTML 조각(iterable of str)을 받아 완성된 행을 하나씩 돌려줍니다.
+    조회일시는 parser.crawled_time 에서 확인합니다.
+    """
+    parser = parser or TicketTableParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        while parser.rows: yield parser.rows.popleft()
+    parser.close()
+    while parser.rows: yield parser.rows.popleft()
+
+def response_chunks(resp):
+    """
+    requests 응답(stream=True)을 문자열 조각으로 읽습니다.
+    """
+    if not resp.encoding: resp.encoding = "utf-8"
+    return resp.iter_content(chunk_size=CHUNK_SIZE, decode_unicode=True)
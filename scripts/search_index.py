@@ -0,0 +1,294 @@
+import os
+import re
+import json
+import heapq
+from collections import Counter
+from functools import lru_cache
+from itertools import chain
+from archive_reader import ARCHIVE_ROOT, iter_archive
+
+# --- [설정] ---
+SEARCH_INDEX_FILE = "public/search_index.json"
+GRAM_SIZE = 3
+MIN_SCORE = 0.5
+TYPO_JAMO_PER_EDIT = 4  # 자모 4개당 오타 1개까지 허용 (최소 1개)
+RERANK_SIZE = 10        # 공유 gram이 많은 상위 후보만 자모 편집 거리로 다시 채점
+
+# 한글 음절 분해용 호환 자모 테이블 (초성 19 / 중성 21 / 종성 27+없음)
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+JONGSEONG = ["", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ",
+             "ㄿ", "ㅀ", "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+CONSONANTS = set(CHOSEONG)
+NON_WORD = re.compile(r"[^0-9a-zㄱ-ㆎ가-힣]")
+
+def normalize(text):
+    return NON_WORD.sub("", (text or "").lower())
+
+def to_jamo(text):
+    """
+    한글 음절을 초/중/종성 자모로 풀어씁니다. ('만약' -> 'ㅁㅏㄴㅇㅑㄱ')
+    오타나 입력 중인 글자도 자모 단위로 겹치는 부분이 많아 부분 일치가 됩니다.
+    """
+    out = []
+    for ch in normalize(text):
+        code = ord(ch) - 0xAC00
+        if 0 <= code < 11172:
+            out.append(CHOSEONG[code // 588])
+            out.append(JUNGSEONG[(code % 588) // 28])
+            out.append(JONGSEONG[code % 28])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+def to_choseong(text):
+    out = []
+    for ch in normalize(text):
+        code = ord(ch) - 0xAC00
+        out.append(CHOSEONG[code // 588] if 0 <= code < 11172 else ch)
+    return "".join(out)
+
+@lru_cache(maxsize=8192)
+def key_forms(key):
+    """
+    검색 키의 (정규화, 자모, 초성) 형태. 인덱스 파일에 저장하지 않고 필요할 때 만들어 재사용합니다.
+    """
+    return normalize(key), to_jamo(key), to_choseong(key)
+
+def is_choseong_query(text):
+    q = normalize(text)
+    return bool(q) and all(ch in CONSONANTS for ch in q)
+
+def make_grams(jamo, size=GRAM_SIZE):
+    if len(jamo) <= size: return {jamo} if jamo else set()
+    return {jamo[i:i + size] for i in range(len(jamo) - size + 1)}
+
+def short_grams(text):
+    # 1~2글자 gram 전부 (3-gram보다 짧은 입력과 초성 입력의 후보 조회용)
+    return {text[i:i + n] for n in range(1, GRAM_SIZE) for i in range(len(text) - n + 1)}
+
+def substring_distance(q, text):
+    """
+    q와 text의 부분 문자열 사이의 최소 편집 거리 (삽입/삭제/치환, 자모 단위)
+    Myers의 비트 병렬 알고리즘으로 text 한 글자당 정수 연산 몇 번으로 계산합니다.
+    (편집 거리 표를 직접 채우는 방식보다 q 길이만큼 빠름)
+    """
+    m = len(q)
+    if not m: return 0
+    peq = {}
+    for i, c in enumerate(q): peq[c] = peq.get(c, 0) | (1 << i)
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv, score = mask, 0, m
+    best = m
+    for c in text:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high: score += 1
+        elif mh & high: score -= 1
+        # 부분 문자열 검색이므로 시작 위치 비용은 0 (왼쪽 시프트에 1을 채우지 않음)
+        ph = (ph << 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+        if score < best: best = score
+    return best
+
+def typo_tolerance(q_jamo):
+    return max(1, len(q_jamo) // TYPO_JAMO_PER_EDIT)
+
+# --- [인덱스 생성] ---
+# 파일 구조:
+#   "docs":   [ {type, id, title, sub, keys} ]
+#   "grams":  { 자모 3-gram: [doc 번호] }
+#   "short":  { 자모 1~2-gram: [doc 번호] }   (3-gram보다 짧은 입력용)
+#   "prefix": { 제목 자모 앞 1~2글자: [doc 번호] }
+#   "cho":    { 초성 1~2-gram: [doc 번호] }
+# sub(영문 제목/방송사)는 표시용이며, 검색 대상은 keys 뿐입니다.
+# docs만 누적 관리하고 나머지 posting 목록은 저장할 때마다 docs로부터 다시 만듭니다.
+POSTING_FIELDS = ["grams", "short", "prefix", "cho"]
+
+def empty_index():
+    index = {"docs": []}
+    for field in POSTING_FIELDS: index[field] = {}
+    return index
+
+def load_search_index(path=SEARCH_INDEX_FILE):
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            index.setdefault("docs", [])
+            for field in POSTING_FIELDS: index.setdefault(field, {})
+            return index
+        except: pass
+    return empty_index()
+
+def make_doc(doc_type, doc_id, title, sub, keys):
+    keys = [k for k in keys if k and normalize(k)]
+    return {"type": doc_type, "id": doc_id, "title": title, "sub": sub, "keys": keys}
+
+def movie_doc(movie):
+    detail = movie.get("detail") or {}
+    title, title_en = movie.get("movieNm", ""), detail.get("movieNmEn", "")
+    people = [p.get("peopleNm", "") for p in detail.get("directors", [])]
+    people += [p.get("peopleNm", "") for p in detail.get("actors", [])[:5]]
+    return make_doc("movie", movie["movieCd"], title, title_en, [title, title_en] + people)
+
+def drama_doc(item):
+    # update_drama가 search_index를 import하므로 순환 import를 피해 함수 안에서 import
+    from update_drama import title_key
+    title = item["title"]
+    return make_doc("drama", title_key(title), title, item.get("channel", ""), [title])
+
+def upsert_docs(index, docs):
+    by_key = {(d["type"], d["id"]): d for d in index["docs"]}
+    for doc in docs:
+        old = by_key.get((doc["type"], doc["id"]))
+        # 영화 상세정보가 빠진 채로 들어온 경우 기존 검색 키(감독/배우)를 유지
+        if old and doc["type"] == "movie" and len(old["keys"]) > len(doc["keys"]): continue
+        by_key[(doc["type"], doc["id"])] = doc
+    # 예전 형식의 jamo/cho 배열은 저장하지 않음 (keys로 다시 만들 수 있음)
+    index["docs"] = [{k: d[k] for k in ["type", "id", "title", "sub", "keys"]}
+                     for d in sorted(by_key.values(), key=lambda d: (d["type"], d["id"]))]
+
+def build_postings(docs):
+    postings = {field: {} for field in POSTING_FIELDS}
+    for i, doc in enumerate(docs):
+        found = {field: set() for field in POSTING_FIELDS}
+        for key in doc["keys"]:
+            _, jamo, cho = key_forms(key)
+            found["grams"] |= make_grams(jamo)
+            found["short"] |= short_grams(jamo)
+            found["cho"] |= short_grams(cho)
+        title_jamo = key_forms(doc["keys"][0])[1] if doc["keys"] else ""
+        found["prefix"] = {title_jamo[:n] for n in range(1, GRAM_SIZE) if len(title_jamo) >= n}
+        for field in POSTING_FIELDS:
+            for g in sorted(found[field]): postings[field].setdefault(g, []).append(i)
+    return postings
+
+def save_search_index(index, path=SEARCH_INDEX_FILE):
+    index.update(build_postings(index["docs"]))
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+
+def update_search_index(movies=None, dramas=None, path=SEARCH_INDEX_FILE):
+    """
+    업데이트 스크립트에서 새로 수집한 영화/드라마만 인덱스에 추가합니다.
+    """
+    index = load_search_index(path)
+    docs = [movie_doc(m) for m in movies or [] if m.get("movieCd")]
+    docs += [drama_doc(d) for d in dramas or [] if d.get("title")]
+    upsert_docs(index, docs)
+    save_search_index(index, path)
+    print(f"  Search index: {len(index['docs'])} titles.")
+
+# --- [검색] ---
+# 모든 경로가 posting 목록으로 후보를 먼저 좁히고, 후보에 대해서만 키를 비교합니다.
+
+def search_result(doc, score):
+    return {"type": doc["type"], "id": doc["id"], "title": doc["title"], "sub": doc["sub"], "score": round(score, 3)}
+
+def posting_candidates(postings, grams):
+    # 모든 gram을 가진 문서 (gram이 없으면 빈 집합)
+    result = None
+    for g in sorted(grams, key=lambda g: len(postings.get(g, []))):
+        ids = postings.get(g)
+        if not ids: return set()
+        result = set(ids) if result is None else result & set(ids)
+    return result or set()
+
+def top_hits(hits, limit):
+    hits.sort(key=lambda x: (x[0], x[1]))
+    return hits[:limit]
+
+def search_titles(index, query, limit=10):
+    q = normalize(query)
+    if not q: return []
+    docs = index["docs"]
+
+    # 초성 검색 ('ㅁㅇㅇㅇㄹ' -> 만약에 우리)
+    # 초성 1~2-gram posting의 교집합을 후보로 하고, 후보만 실제 초성 문자열로 확인
+    if is_choseong_query(q):
+        hits = []
+        for i in sorted(posting_candidates(index["cho"], make_grams(q, GRAM_SIZE - 1))):
+            doc = docs[i]
+            pos = min((c.find(q) for _, _, c in map(key_forms, doc["keys"]) if q in c), default=-1)
+            if pos >= 0: hits.append((0 if pos == 0 else 1, len(doc["title"]), doc))
+        return [search_result(h[2], 2 - h[0]) for h in top_hits(hits, limit)]
+
+    q_jamo = to_jamo(q)
+
+    # 3-gram보다 짧은 입력(첫 글자 입력 중 등)은 1~2-gram posting을 그대로 후보로 사용
+    # 순위: 제목이 입력으로 시작 > 글자 그대로 포함 > 자모로만 포함 ('해' -> '행')
+    if len(q_jamo) < GRAM_SIZE:
+        prefix_ids = index["prefix"].get(q_jamo, [])
+        prefix = set(prefix_ids)
+        hits = [(0, len(docs[i]["title"]), docs[i]) for i in prefix_ids]
+        # 제목 앞부분 일치만으로 limit을 채우면 나머지 후보는 비교하지 않음
+        if len(hits) < limit:
+            for i in index["short"].get(q_jamo, []):
+                if i in prefix: continue
+                doc = docs[i]
+                tier = 1 if any(q in key_forms(k)[0] for k in doc["keys"]) else 2
+                hits.append((tier, len(doc["title"]), doc))
+        return [search_result(h[2], 2 - h[0] / 2) for h in top_hits(hits, limit)]
+
+    # 자모 3-gram을 하나라도 공유하는 문서를 후보로 삼아 일치율(공유 gram 비율)로 점수를 매기고,
+    # 모든 gram을 공유하는 후보는 실제 부분 일치(+1)를 확인.
+    # 자모 편집 거리는 공유 gram 수 상위 RERANK_SIZE개 후보에만 계산.
+    # 편집 거리는 자모 TYPO_JAMO_PER_EDIT개당 1개(최소 1개)까지 허용
+    # (예: '아버타' -> '아바타'는 자모 6개 중 1개 차이로 허용)
+    # 편집 1번은 gram을 최대 GRAM_SIZE개 깨뜨리므로, 공유 gram이 need개 미만인 문서/키는 거리 계산 생략
+    # (부분 일치는 모든 gram을 공유할 때만 가능)
+    q_grams = make_grams(q_jamo)
+    tolerance = typo_tolerance(q_jamo)
+    need = max(1, len(q_grams) - GRAM_SIZE * tolerance)
+    counts = Counter(chain.from_iterable(index["grams"].get(g, []) for g in sorted(q_grams)))
+    top = heapq.nsmallest(RERANK_SIZE, counts.items(), key=lambda x: (-x[1], len(docs[x[0]]["title"]), x[0]))
+    top_ids = {i for i, _ in top}
+    total = len(q_grams)
+    min_cnt = MIN_SCORE * total
+
+    results = []
+    for i, cnt in counts.items():
+        if cnt < min_cnt and i not in top_ids: continue
+        doc = docs[i]
+        score = cnt / total
+        if cnt == total or (i in top_ids and cnt >= need):
+            jamo = [key_forms(k)[1] for k in doc["keys"]]
+            if cnt == total and any(q_jamo in k for k in jamo):
+                score += 1
+            elif i in top_ids and score < 1:
+                near = [k for k in jamo if sum(g in k for g in q_grams) >= need]
+                dist = min((substring_distance(q_jamo, k) for k in near), default=tolerance + 1)
+                if dist <= tolerance: score = max(score, 1 - dist / len(q_jamo))
+        if score >= MIN_SCORE: results.append((score, -len(doc["title"]), doc))
+    results.sort(key=lambda x: (x[0], x[1]), reverse=True)
+    return [search_result(r[2], r[0]) for r in results[:limit]]
+
+def build_search_index():
+    """
+    영화/드라마 아카이브 전체로 검색 인덱스를 새로 만듭니다.
+    """
+    print("Building search index from archive...")
+    index = empty_index()
+    movie_docs, drama_docs = {}, {}
+
+    for _, day in iter_archive("movie", root=ARCHIVE_ROOT):
+        for movie in day.get("movies", []):
+            if movie.get("movieCd"): movie_docs[movie["movieCd"]] = movie_doc(movie)
+
+    for _, day in iter_archive("drama", root=ARCHIVE_ROOT):
+        for item in day.get("nationwide", []) + day.get("capital", []):
+            if item.get("title"): drama_docs[item["title"]] = drama_doc(item)
+
+    upsert_docs(index, list(movie_docs.values()) + list(drama_docs.values()))
+    save_search_index(index)
+    print(f"✅ Indexed {len(movie_docs)} movies, {len(drama_docs)} dramas.")
+
+if __name__ == "__main__":
+    build_search_index()
@@ -1,14 +1,21 @@
 import os
 import json
+import hashlib
 import requests
 import datetime
 from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
+from search_index import update_search_index
+from archive_reader import list_archive, load_many
 
 # --- [설정] ---
 DAILY_FILE = "public/daily_data.json"
 ARCHIVE_DIR = "public/archive"
 MANUAL_FILE = "manual_data.json"
+ROLLUP_DIR = "public/rollups"
+ROLLUP_INDEX_FILE = os.path.join(ROLLUP_DIR, "index.json")
+ROLLUP_PERIODS = ["week", "weekend", "month"]
+ROLLUP_FIELDS = ["audiCnt", "salesAmt", "showCnt"]
 KOBIS_API_KEY = os.environ.get("KOBIS_API_KEY")
 
 # [핵심] 과거 데이터를 얼마나 뒤져볼 것인가? (7일이면 충분)
@@ -65,6 +72,123 @@ def fetch_movie_detail(movie_cd, movie_nm, cache, manual_data):
     except: pass
     return {}
 
+# --- [기간별 집계] ---
+# 일별 아카이브를 ISO 주간 / 주말(금~일) / 월 단위로 누적 집계합니다.
+# 새로 들어왔거나 내용이 바뀐 날짜가 속한 버킷 파일만 갱신하므로 요청 시점에는 계산이 필요 없습니다.
+# 버킷에는 날짜별 기여분(daily)을 함께 저장해, 같은 날짜가 다시 들어오면 합산하지 않고 교체합니다.
+# (시장 합계는 일별 Top10 기준)
+
+def rollup_keys(date_str):
+    d = datetime.datetime.strptime(date_str, "%Y%m%d").date()
+    iso_year, iso_week, iso_day = d.isocalendar()
+    keys = {}
+    for period in ROLLUP_PERIODS:
+        if period == "week":
+            keys[period] = f"{iso_year}-W{iso_week:02d}"
+        elif period == "month":
+            keys[period] = date_str[:6]
+        elif period == "weekend" and iso_day >= 5:
+            # 금(5), 토(6), 일(7)만 주말 버킷에 포함, 키는 해당 주 금요일
+            keys[period] = (d - datetime.timedelta(days=iso_day - 5)).strftime("%Y%m%d")
+    return keys
+
+def load_json_file(path, default):
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f: return json.load(f)
+        except: pass
+    return default
+
+def file_sha1(path):
+    with open(path, 'rb') as f: return hashlib.sha1(f.read()).hexdigest()
+
+def day_contribution(movies):
+    market = {field: 0 for field in ROLLUP_FIELDS}
+    by_cd = {}
+    for movie in movies:
+        movie_cd = movie.get("movieCd")
+        if not movie_cd: continue
+        row = {"movieNm": movie.get("movieNm", "")}
+        for field in ROLLUP_FIELDS:
+            try: val = int(movie.get(field) or 0)
+            except: val = 0
+            row[field] = val
+            market[field] += val
+        by_cd[movie_cd] = row
+    return {"market": market, "movies": by_cd}
+
+def recompute_bucket(bucket):
+    """
+    날짜별 기여분(daily)으로 버킷 합계를 다시 계산합니다.
+    """
+    market = {field: 0 for field in ROLLUP_FIELDS}
+    by_cd = {}
+    for date_str in sorted(bucket["daily"]):
+        day = bucket["daily"][date_str]
+        for field in ROLLUP_FIELDS: market[field] += day["market"][field]
+        for movie_cd, m in day["movies"].items():
+            row = by_cd.get(movie_cd)
+            if row is None:
+                row = {"movieCd": movie_cd, "movieNm": m["movieNm"], "days": 0}
+                for field in ROLLUP_FIELDS: row[field] = 0
+                by_cd[movie_cd] = row
+            row["days"] += 1
+            for field in ROLLUP_FIELDS: row[field] += m[field]
+    bucket["dates"] = sorted(bucket["daily"])
+    bucket["market"] = market
+    bucket["movies"] = sorted(by_cd.values(), key=lambda x: x["audiCnt"], reverse=True)
+
+def update_rollups(recheck=()):
+    """
+    아직 집계되지 않았거나 내용이 바뀐 아카이브 날짜만 해당 버킷(주간/주말/월)에 반영합니다.
+    변경 여부는 파일 크기로 먼저 보고, recheck에 넘긴 날짜(이번 실행에서 다시 쓴 파일)는 해시까지 비교합니다.
+    """
+    index = load_json_file(ROLLUP_INDEX_FILE, {})
+    applied = index.get("applied", {})
+    if not isinstance(applied, dict): applied = {}
+    archive = list_archive("movie", ARCHIVE_DIR)
+
+    pending = {}
+    for date_str, path in sorted(archive.items()):
+        size = os.path.getsize(path)
+        rec = applied.get(date_str)
+        if rec and rec.get("size") == size and date_str not in recheck: continue
+        sha1 = file_sha1(path)
+        if rec and rec.get("sha1") == sha1 and rec.get("size") == size: continue
+        pending[date_str] = {"size": size, "sha1": sha1}
+    if not pending:
+        print("  Rollups up to date.")
+        return
+
+    touched = {}
+    dates = sorted(pending)
+    days = load_many([archive[d] for d in dates], cache=False)
+    for date_str, day in zip(dates, days):
+        if not day: continue
+        contribution = day_contribution(day.get("movies", []))
+        for period, key in rollup_keys(date_str).items():
+            if (period, key) not in touched:
+                path = os.path.join(ROLLUP_DIR, period, f"{key}.json")
+                bucket = load_json_file(path, {"period": period, "key": key})
+                bucket.setdefault("daily", {})
+                touched[(period, key)] = bucket
+            touched[(period, key)]["daily"][date_str] = contribution
+        applied[date_str] = pending[date_str]
+
+    for (period, key), bucket in touched.items():
+        recompute_bucket(bucket)
+        os.makedirs(os.path.join(ROLLUP_DIR, period), exist_ok=True)
+        with open(os.path.join(ROLLUP_DIR, period, f"{key}.json"), 'w', encoding='utf-8') as f:
+            json.dump(bucket, f, ensure_ascii=False, indent=2)
+        keys = set(index.get(period, []))
+        keys.add(key)
+        index[period] = sorted(keys)
+
+    index["applied"] = dict(sorted(applied.items()))
+    with open(ROLLUP_INDEX_FILE, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    print(f"  Rolled up {len(pending)} day(s) into {len(touched)} bucket(s).")
+
 def main():
     if not KOBIS_API_KEY: 
         print("❌ Error: KOBIS_API_KEY is missing.")
@@ -146,6 +270,10 @@ def main():
     with open(os.path.join(d_path, f"{yesterday}.json"), 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
+    # 기간별 집계 / 검색 인덱스 갱신
+    update_rollups(recheck={yesterday})
+    update_search_index(movies=final_movies)
+
     print("✅ Done.")
 
 if __name__ == "__main__":
@@ -3,12 +3,16 @@ import json
 import requests
 import time
 import re
+import hashlib
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta, timezone
+from search_index import update_search_index
+from archive_reader import read_json, load_many
 
 # --- [설정] ---
 MAIN_FILE = "public/drama_data.json"
 ARCHIVE_ROOT = "public/archive/drama"
+INDEX_DIR = "public/drama_index"
 NIELSEN_BASE_URL = "https://www.nielsenkorea.co.kr/tv_terrestrial_day.asp"
 NAVER_SEARCH_URL = "https://search.naver.com/search.naver?where=nexearch&query="
 
@@ -140,6 +144,96 @@ def is_data_complete(data_list):
     has_field = any('mediaType' in item for item in data_list)
     return has_others or (has_field and len(data_list) > 10)
 
+# --- [시청률 인덱스] ---
+# 제목별 시청률 시계열을 제목마다 파일 하나로 나눠 저장하고, 매 실행마다 새로 수집된 날짜만 반영합니다.
+# 실행 비용은 전체 이력이 아니라 이번에 등장한 제목 수(와 그 제목의 이력 길이)에만 비례합니다.
+#   drama_index/meta.json   : { "dates": [최근 반영 완료 날짜] }
+#   drama_index/<해시>.json : { "title": 제목키, "nationwide": {날짜: 시청률}, "capital": {...},
+#                               "weekly_nationwide": {주 시작일: 시청률}, "weekly_capital": {...} }
+INDEX_SERIES = ["nationwide", "capital", "weekly_nationwide", "weekly_capital"]
+INDEX_DATES_KEEP = 60   # 수집 범위(30일)만 확인하면 되므로 meta에는 최근 날짜만 유지
+
+def title_key(title):
+    return title.replace(" ", "").strip()
+
+def week_start(d_str):
+    # 주간 랭킹은 해당 주 월요일 날짜로 저장 (같은 주를 여러 번 받아도 한 번만 기록)
+    d = datetime.strptime(d_str, "%Y%m%d")
+    return (d - timedelta(days=d.weekday())).strftime("%Y%m%d")
+
+def shard_path(key):
+    # 제목에 파일명으로 쓸 수 없는 문자가 있을 수 있어 해시로 파일명 생성
+    return os.path.join(INDEX_DIR, hashlib.sha1(key.encode('utf-8')).hexdigest()[:16] + ".json")
+
+def load_index():
+    """
+    meta만 읽고, 제목별 시계열은 필요할 때 get_entry()로 읽습니다.
+    """
+    dates = []
+    meta_path = os.path.join(INDEX_DIR, "meta.json")
+    if os.path.exists(meta_path):
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f: dates = json.load(f).get("dates", [])
+        except: pass
+    return {"dates": dates, "titles": {}, "dirty": set(), "trends": {}}
+
+def get_entry(index, key):
+    if key not in index["titles"]:
+        entry = {"title": key}
+        path = shard_path(key)
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f: entry = json.load(f)
+            except: pass
+        index["titles"][key] = entry
+    return index["titles"][key]
+
+def save_index(index):
+    """
+    이번 실행에서 바뀐 제목 파일과 meta만 씁니다.
+    """
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    for key in sorted(index["dirty"]):
+        entry = index["titles"][key]
+        for series in INDEX_SERIES:
+            if series in entry: entry[series] = dict(sorted(entry[series].items()))
+        with open(shard_path(key), 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False, separators=(',', ':'))
+    index["dirty"].clear()
+
+    index["dates"] = sorted(set(index["dates"]))[-INDEX_DATES_KEEP:]
+    with open(os.path.join(INDEX_DIR, "meta.json"), 'w', encoding='utf-8') as f:
+        json.dump({"dates": index["dates"]}, f, ensure_ascii=False, indent=2)
+
+def index_rankings(index, d_str, rankings, series):
+    """
+    한 날짜의 순위 리스트를 인덱스의 해당 시리즈에 반영합니다. (같은 날짜는 덮어씀)
+    """
+    for item in rankings or []:
+        key = title_key(item['title'])
+        get_entry(index, key).setdefault(series, {})[d_str] = item['ratingVal']
+        index["dirty"].add(key)
+        index["trends"].pop((key, series), None)
+
+def index_daily(index, daily_json):
+    d_str = daily_json["date"]
+    index_rankings(index, d_str, daily_json.get("nationwide"), "nationwide")
+    index_rankings(index, d_str, daily_json.get("capital"), "capital")
+    if d_str not in index["dates"]: index["dates"].append(d_str)
+
+def index_weekly(index, d_str, weekly_nw, weekly_cp):
+    w_str = week_start(d_str)
+    index_rankings(index, w_str, weekly_nw, "weekly_nationwide")
+    index_rankings(index, w_str, weekly_cp, "weekly_capital")
+
+def get_trend(index, title, series="nationwide"):
+    # 같은 제목이 여러 리스트에 나오므로 제목별로 한 번만 정렬
+    memo_key = (title_key(title), series)
+    if memo_key not in index["trends"]:
+        points = get_entry(index, memo_key[0]).get(series, {})
+        index["trends"][memo_key] = [{ "date": d, "rating": points[d] } for d in sorted(points)]
+    return [dict(p) for p in index["trends"][memo_key]]
+
 def update_drama_data():
     print("Starting Integrated Drama Update (Terrestrial + Jongpyeon + Cable)...")
     
@@ -147,26 +241,37 @@ def update_drama_data():
     kst_timezone = timezone(timedelta(hours=9))
     today = datetime.now(kst_timezone)
     
-    trend_history = {}
+    index = load_index()
+    indexed_dates = set(index["dates"])
     latest_data = None
     drama_details_cache = {} 
 
     if not os.path.exists(ARCHIVE_ROOT): os.makedirs(ARCHIVE_ROOT)
     
+    # 인덱스에 없는 기존 파일은 완성 여부 확인을 위해 한 번에 병렬로 읽어둠
+    window = [(today - timedelta(days=i)).strftime("%Y%m%d") for i in range(1, 31)]
+    to_check = [d for d in window if d not in indexed_dates and os.path.exists(os.path.join(ARCHIVE_ROOT, f"{d}.json"))]
+    loaded = dict(zip(to_check, load_many([os.path.join(ARCHIVE_ROOT, f"{d}.json") for d in to_check], cache=False)))
+    
     # --- [A] 일일 데이터 수집 (과거 30일) ---
-    for i in range(1, 31):
-        target_date = today - timedelta(days=i)
-        d_str = target_date.strftime("%Y%m%d")
+    for d_str in window:
         f_path = os.path.join(ARCHIVE_ROOT, f"{d_str}.json")
         
+        # 인덱스에 반영된 날짜는 이미 통합 데이터가 확인된 것이므로 파일을 다시 읽지 않음
+        # (단, 최신 날짜 하나는 메인 파일 생성을 위해 로드)
+        if d_str in indexed_dates and os.path.exists(f_path):
+            if latest_data is None:
+                try: latest_data = read_json(f_path, cache=False)
+                except: pass
+            continue
+
         need_fetch = True
         daily_json = None
 
         # 파일이 존재하면 로드해서 검사
-        if os.path.exists(f_path):
+        if loaded.get(d_str) is not None:
             try:
-                with open(f_path, 'r', encoding='utf-8') as f: 
-                    daily_json = json.load(f)
+                daily_json = loaded[d_str]
                 
                 # [핵심] 기존 데이터가 '지상파만' 있는 반쪽짜리 데이터인지 확인
                 nw_list = daily_json.get("nationwide", [])
@@ -195,15 +300,10 @@ def update_drama_data():
                 print(f"  ⚠️ No data available for {d_str}")
                 daily_json = None # 수집 실패 처리
         
-        # 트렌드용 히스토리 축적
+        # 새로 확인된 날짜만 인덱스에 반영
         if daily_json:
             if latest_data is None: latest_data = daily_json
-            
-            for item in daily_json.get("nationwide", []):
-                title = item['title'].replace(" ", "").strip()
-                if title not in trend_history: trend_history[title] = []
-                if not any(x['date'] == d_str for x in trend_history[title]):
-                    trend_history[title].append({ "date": d_str, "rating": item['ratingVal'] })
+            index_daily(index, daily_json)
 
     # --- [B] 주간 데이터 수집 (최신 주간) ---
     if latest_data:
@@ -216,6 +316,10 @@ def update_drama_data():
         
         latest_data["weekly_nationwide"] = weekly_nw
         latest_data["weekly_capital"] = weekly_cp
+        index_weekly(index, yesterday_str, weekly_nw, weekly_cp)
+
+    if not os.path.exists("public"): os.makedirs("public")
+    save_index(index)
 
     # --- [C] 네이버 정보 & 트렌드 병합 ---
     if latest_data:
@@ -232,9 +336,8 @@ def update_drama_data():
         for lst in target_lists:
             if not lst: continue
             for item in lst:
-                # 트렌드 매핑
-                title_key = item['title'].replace(" ", "").strip()
-                item['trend'] = sorted(trend_history.get(title_key, []), key=lambda x: x['date'])
+                # 트렌드 매핑 (방영 전체 기간)
+                item['trend'] = get_trend(index, item['title'])
                 
                 # 네이버 크롤링 (캐시 활용)
                 raw_title = item['title']
@@ -249,9 +352,9 @@ def update_drama_data():
                     item.update(drama_details_cache[raw_title])
 
         # 최종 저장
-        if not os.path.exists("public"): os.makedirs("public")
         with open(MAIN_FILE, 'w', encoding='utf-8') as f:
             json.dump(latest_data, f, ensure_ascii=False, indent=2)
+        update_search_index(dramas=[item for lst in target_lists for item in lst])
         print("✅ Integrated Drama Data Updated (Daily & Weekly).")
         
     else:
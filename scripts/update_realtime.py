@@ -1,10 +1,12 @@
 import os
 import json
+import hashlib
+import argparse
 import requests
-import re
 import datetime
 import time
 from bs4 import BeautifulSoup
+from realtime_stream import TicketTableParser, iter_ticket_rows, response_chunks
 
 # --- [설정] ---
 REALTIME_FILE = "public/realtime_data.json"
@@ -14,8 +16,17 @@ KOBIS_REALTIME_URL = "https://www.kobis.or.kr/kobis/business/stat/boxs/findRealT
 KOBIS_DETAIL_URL = "https://www.kobis.or.kr/kobisopenapi/webservice/rest/movie/searchMovieInfo.json"
 KOBIS_API_KEY = os.environ.get("KOBIS_API_KEY")
 
-# JavaScript 함수 mstView('movie', '20231234') 에서 코드 추출용
-MSTVIEW_REGEX = re.compile(r"mstView\s*\(\s*['\"]movie['\"]\s*,\s*['\"]([0-9]+)['\"]\s*\)")
+# --- [스케줄러 설정] ---
+# 상태 파일은 public 밖에 두어 변화가 없을 때 커밋이 생기지 않도록 함 (Actions에서는 캐시로 유지)
+STATE_FILE = ".cache/realtime_state.json"
+MIN_INTERVAL = 15     # 분, 변화가 잦을 때 (개봉일 등)
+MAX_INTERVAL = 120    # 분, 변화가 거의 없을 때
+NIGHT_MAX_INTERVAL = 240
+NIGHT_HOURS = range(1, 7)   # KST 01~06시는 예매 변동이 적음
+CRON_MINUTES = 15           # 워크플로 cron 주기 (0,15,30,45분)
+CHANGE_RATE_ALPHA = 0.3     # 변화율 지수이동평균 가중치
+HASH_FIELDS = ["rank", "title", "movieCd", "rate", "salesAmt", "salesAcc", "audiCnt", "audiAcc"]
+KST = datetime.timezone(datetime.timedelta(hours=9))
 
 def load_json(filepath):
     if os.path.exists(filepath):
@@ -46,11 +57,52 @@ def is_same_data(last, new):
         last['audiCnt'] == new['audiCnt']
     )
 
-def update_realtime():
-    print("Updating Realtime Data...")
+def table_hash(rows):
+    """
+    조회일시를 제외한 예매 표 내용의 해시 (직전 크롤링과 비교용)
+    """
+    h = hashlib.sha1()
+    for row in rows:
+        h.update("\t".join(row[k] for k in HASH_FIELDS).encode('utf-8'))
+        h.update(b"\n")
+    return h.hexdigest()
+
+def file_hash(path):
+    if not os.path.exists(path): return None
+    with open(path, 'rb') as f: return hashlib.sha1(f.read()).hexdigest()
+
+def fetch_ticket_rows():
+    """
+    KOBIS 실시간 예매 표를 스트리밍으로 읽어 (행 목록, 조회일시)를 반환합니다.
+    """
+    session = requests.Session()
+    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36'}
+    
+    # 1. KOBIS 페이지 접속 (세션 쿠키 및 CSRF 토큰 획득)
+    visit = session.get(KOBIS_REALTIME_URL, headers=headers, timeout=10)
+    soup = BeautifulSoup(visit.text, 'html.parser')
+    csrf_input = soup.find('input', {'name': 'CSRFToken'})
+    if not csrf_input:
+        print("CSRF Token not found.")
+        return [], ""
+    csrf = csrf_input['value']
     
-    # 기존 데이터 로드 (히스토리 유지를 위해 필수)
-    realtime_data = load_json(REALTIME_FILE)
+    # 2. 데이터 요청 (POST) - 응답 전체를 메모리에 올리지 않고 스트리밍으로 읽음
+    # (stream=True는 본문을 다 읽기 전까지 연결을 잡고 있으므로 with로 반드시 닫음)
+    with session.post(KOBIS_REALTIME_URL, headers=headers, data={
+        'CSRFToken': csrf, 
+        'dmlMode': 'search', 
+        'allMovieYn': 'Y', # 전체 영화 조회
+        'loadEnd': '0'
+    }, timeout=20, stream=True) as resp:
+        # 3. 영화 목록 파싱 (DOM 없이 행 단위로 추출, 순위가 숫자인 행만)
+        parser = TicketTableParser()
+        rows = [row for row in iter_ticket_rows(response_chunks(resp), parser)
+                if row["rank"].isdigit() and row["title"]]
+    crawled_time = parser.crawled_time or datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+    return rows, crawled_time
+
+def merge_rows(realtime_data, rows, crawled_time):
     daily_data = load_json(DAILY_FILE)
     manual_data = load_json(MANUAL_FILE)
     
@@ -61,141 +113,180 @@ def update_realtime():
             if "movieCd" in m and "detail" in m:
                 detail_cache_cd[m["movieCd"]] = m["detail"]
 
-    session = requests.Session()
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36'}
-    
-    try:
-        # 1. KOBIS 페이지 접속 (세션 쿠키 및 CSRF 토큰 획득)
-        visit = session.get(KOBIS_REALTIME_URL, headers=headers, timeout=10)
-        soup = BeautifulSoup(visit.text, 'html.parser')
-        csrf_input = soup.find('input', {'name': 'CSRFToken'})
-        if not csrf_input:
-            print("CSRF Token not found.")
-            return
-        csrf = csrf_input['value']
+    # 메타 데이터 저장소 초기화
+    if "meta" not in realtime_data: realtime_data["meta"] = {}
+
+    for row in rows:
+        rank = row["rank"]
+        title = row["title"]
+        movie_cd = row["movieCd"]
         
-        # 2. 데이터 요청 (POST)
-        resp = session.post(KOBIS_REALTIME_URL, headers=headers, data={
-            'CSRFToken': csrf, 
-            'dmlMode': 'search', 
-            'allMovieYn': 'Y', # 전체 영화 조회
-            'loadEnd': '0'
-        }, timeout=20)
+        # [상세 정보 확보]
+        # 이미 있는 메타 정보는 유지하되, 없으면 API/캐시/수동데이터에서 찾음
+        if title not in realtime_data["meta"] or "posterUrl" not in realtime_data["meta"][title]:
+            found_detail = None
+            
+            # A. API/캐시 데이터 먼저 확인
+            if movie_cd and movie_cd in detail_cache_cd:
+                found_detail = detail_cache_cd[movie_cd]
+            elif movie_cd and int(rank) <= 20: # 상위 20위만 API 호출 (제한 고려)
+                found_detail = fetch_movie_detail(movie_cd)
+                if found_detail: time.sleep(0.1)
+
+            if not found_detail: found_detail = {}
+            
+            # B. 수동 데이터(포스터 등) 병합
+            clean_title = title.replace(" ", "")
+            for m_title, m_info in manual_data.items():
+                if m_title.replace(" ", "") == clean_title:
+                    found_detail.update(m_info) 
+                    break
+            
+            # 메타데이터 저장
+            realtime_data["meta"][title] = found_detail
+
+        # 데이터 추출
+        rate = row["rate"].replace('%', '')
+        audi_cnt_raw = row["audiCnt"]
+        sales_amt_raw = row["salesAmt"]
+        audi_acc_raw = row["audiAcc"]
+        sales_acc_raw = row["salesAcc"]
+
+        # [핵심] 히스토리 데이터 구조 초기화
+        # 키는 영화 제목 (공백 제거하여 매칭 확률 높여도 좋지만 여기선 원본 제목 사용)
+        if title not in realtime_data: realtime_data[title] = []
         
-        soup = BeautifulSoup(resp.text, 'html.parser')
+        new_entry = {
+            "time": crawled_time,
+            "rank": int(rank),
+            "rate": float(rate) if rate else 0,
+            "audiCnt": audi_cnt_raw, 
+            "salesAmt": sales_amt_raw,
+            "audiAcc": audi_acc_raw,
+            "salesAcc": sales_acc_raw,
+            # 그래프 그리기 편하게 숫자형 변환 값 미리 저장
+            "val_audi": int(audi_cnt_raw.replace(',', '')) if audi_cnt_raw.replace(',', '').isdigit() else 0,
+            "val_rate": float(rate) if rate else 0
+        }
         
-        # 조회 시간 파싱
-        crawled_time = ""
-        try:
-            txt = soup.get_text()
-            match = re.search(r"조회일시\s*:\s*(\d{4}[./-]\d{2}[./-]\d{2}\s+\d{2}:\d{2})", txt)
-            if match: crawled_time = match.group(1).replace("/", "-")
-        except: pass
-        if not crawled_time: 
-            crawled_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
-
-        rows = soup.find_all("tr")
-        count = 0
+        # 마지막 데이터와 비교하여 중복 아니면 추가
+        last = realtime_data[title][-1] if realtime_data[title] else None
+        
+        if is_same_data(last, new_entry):
+            # 데이터가 같으면 시간만 업데이트 (최신 조회 시간으로)
+            realtime_data[title][-1]['time'] = crawled_time
+        else:
+            realtime_data[title].append(new_entry)
         
-        # 메타 데이터 저장소 초기화
-        if "meta" not in realtime_data: realtime_data["meta"] = {}
+        # 데이터가 너무 많이 쌓이면 오래된 것 삭제 (최근 288개 = 약 12일치 유지)
+        if len(realtime_data[title]) > 288:
+            realtime_data[title] = realtime_data[title][-288:]
 
-        # 3. 영화 목록 파싱
-        for row in rows:
-            cols = row.find_all("td")
-            if len(cols) < 8: continue
-            
-            rank = cols[0].get_text(strip=True)
-            if not rank.isdigit(): continue
-            
-            # 영화 제목 및 코드 추출
-            target_link = row.find("a", onclick=MSTVIEW_REGEX.search)
-            title = ""
-            movie_cd = ""
-            
-            if target_link:
-                title = target_link.get("title", "").strip() or target_link.get_text(strip=True)
-                match = MSTVIEW_REGEX.search(target_link['onclick'])
-                if match: movie_cd = match.group(1)
-            else:
-                title = cols[1].get_text(strip=True)
-            
-            if not title: continue
-            
-            # [상세 정보 확보]
-            # 이미 있는 메타 정보는 유지하되, 없으면 API/캐시/수동데이터에서 찾음
-            if title not in realtime_data["meta"] or "posterUrl" not in realtime_data["meta"][title]:
-                found_detail = None
-                
-                # A. API/캐시 데이터 먼저 확인
-                if movie_cd and movie_cd in detail_cache_cd:
-                    found_detail = detail_cache_cd[movie_cd]
-                elif movie_cd and int(rank) <= 20: # 상위 20위만 API 호출 (제한 고려)
-                    found_detail = fetch_movie_detail(movie_cd)
-                    if found_detail: time.sleep(0.1)
-
-                if not found_detail: found_detail = {}
-                
-                # B. 수동 데이터(포스터 등) 병합
-                clean_title = title.replace(" ", "")
-                for m_title, m_info in manual_data.items():
-                    if m_title.replace(" ", "") == clean_title:
-                        found_detail.update(m_info) 
-                        break
-                
-                # 메타데이터 저장
-                realtime_data["meta"][title] = found_detail
-
-            # 데이터 추출
-            rate = cols[3].get_text(strip=True).replace('%', '')
-            audi_cnt_raw = cols[6].get_text(strip=True)
-            sales_amt_raw = cols[4].get_text(strip=True)
-            audi_acc_raw = cols[7].get_text(strip=True)
-            sales_acc_raw = cols[5].get_text(strip=True)
-
-            # [핵심] 히스토리 데이터 구조 초기화
-            # 키는 영화 제목 (공백 제거하여 매칭 확률 높여도 좋지만 여기선 원본 제목 사용)
-            if title not in realtime_data: realtime_data[title] = []
-            
-            new_entry = {
-                "time": crawled_time,
-                "rank": int(rank),
-                "rate": float(rate) if rate else 0,
-                "audiCnt": audi_cnt_raw, 
-                "salesAmt": sales_amt_raw,
-                "audiAcc": audi_acc_raw,
-                "salesAcc": sales_acc_raw,
-                # 그래프 그리기 편하게 숫자형 변환 값 미리 저장
-                "val_audi": int(audi_cnt_raw.replace(',', '')) if audi_cnt_raw.replace(',', '').isdigit() else 0,
-                "val_rate": float(rate) if rate else 0
-            }
-            
-            # 마지막 데이터와 비교하여 중복 아니면 추가
-            last = realtime_data[title][-1] if realtime_data[title] else None
+def next_interval(change_rate, now):
+    """
+    최근 변화율(0~1)과 시간대로 다음 크롤링 간격(분)을 정합니다.
+    자주 바뀔수록 MIN_INTERVAL에 가깝게, 새벽에는 간격을 늘립니다.
+    """
+    interval = MIN_INTERVAL + (MAX_INTERVAL - MIN_INTERVAL) * (1 - change_rate)
+    if now.hour in NIGHT_HOURS:
+        interval = min(interval * 2, NIGHT_MAX_INTERVAL)
+    return int(round(interval))
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+    with open(STATE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+
+def update_realtime():
+    """
+    한 번 크롤링합니다. 예매 표가 직전과 같으면 병합/저장을 건너뜁니다.
+    단, 직전에 저장한 realtime_data.json이 그대로 남아 있을 때만 건너뜁니다.
+    (저장 후 커밋/푸시가 실패하면 상태 파일만 캐시에 남고 데이터는 사라질 수 있음)
+    다음 크롤링 시각은 상태 파일(nextCrawlAt)에 기록합니다.
+    """
+    print("Updating Realtime Data...")
+    state = load_json(STATE_FILE)
+    now = datetime.datetime.now(KST)
+    
+    try:
+        rows, crawled_time = fetch_ticket_rows()
+        if not rows:
+            print("⚠️ No data parsed.")
+        else:
+            digest = table_hash(rows)
+            changed = digest != state.get("hash")
+            rate = state.get("changeRate", 1.0)
+            state["changeRate"] = round((1 - CHANGE_RATE_ALPHA) * rate + CHANGE_RATE_ALPHA * (1 if changed else 0), 4)
+            state["lastCrawl"] = now.strftime("%Y-%m-%d %H:%M")
+        
+            # 디스크의 데이터가 직전에 저장한 것과 다르면(푸시 실패 등) 표가 같아도 다시 병합
+            stale = file_hash(REALTIME_FILE) != state.get("dataHash")
+
+            if changed or stale:
+                # 기존 데이터 로드 (히스토리 유지를 위해 필수)
+                realtime_data = load_json(REALTIME_FILE)
+                merge_rows(realtime_data, rows, crawled_time)
             
-            if is_same_data(last, new_entry):
-                # 데이터가 같으면 시간만 업데이트 (최신 조회 시간으로)
-                realtime_data[title][-1]['time'] = crawled_time
+                # 4. 파일 저장
+                if not os.path.exists("public"): os.makedirs("public")
+                with open(REALTIME_FILE, 'w', encoding='utf-8') as f:
+                    json.dump(realtime_data, f, ensure_ascii=False, indent=2)
+                state["hash"] = digest
+                state["dataHash"] = file_hash(REALTIME_FILE)
+                if changed: state["lastChange"] = crawled_time
+                print(f"✅ Updated {len(rows)} movies at {crawled_time}")
             else:
-                realtime_data[title].append(new_entry)
-            
-            # 데이터가 너무 많이 쌓이면 오래된 것 삭제 (최근 288개 = 약 12일치 유지)
-            if len(realtime_data[title]) > 288:
-                realtime_data[title] = realtime_data[title][-288:]
-            
-            count += 1
-
-        # 4. 파일 저장
-        if count > 0:
-            if not os.path.exists("public"): os.makedirs("public")
-            with open(REALTIME_FILE, 'w', encoding='utf-8') as f:
-                json.dump(realtime_data, f, ensure_ascii=False, indent=2)
-            print(f"✅ Updated {count} movies at {crawled_time}")
-        else:
-            print("⚠️ No data parsed.")
+                print(f"💤 Ticket table unchanged since {state.get('lastChange', '?')}, skipping write.")
 
     except Exception as e:
         print(f"❌ Update Failed: {e}")
+    
+    interval = next_interval(state.get("changeRate", 1.0), now)
+    state["interval"] = interval
+    state["nextCrawlAt"] = snap_to_cron(now + datetime.timedelta(minutes=interval)).strftime("%Y-%m-%d %H:%M")
+    save_state(state)
+    print(f"  Next crawl in {interval} min ({state['nextCrawlAt']} KST)")
+    return state
+
+def snap_to_cron(dt):
+    """
+    다음 실행 시각을 cron 눈금(CRON_MINUTES 단위)으로 내림합니다.
+    GitHub cron은 몇 분씩 늦게 시작하는 일이 잦아, 늦게 시작한 실행 기준으로 시각을 잡으면
+    다음 눈금보다 뒤가 되어 한 번을 통째로 건너뛰게 됨 (15분 간격이 30분이 됨)
+    """
+    return dt.replace(minute=dt.minute - dt.minute % CRON_MINUTES, second=0, microsecond=0)
+
+def is_due(state, now):
+    next_at = state.get("nextCrawlAt")
+    if not next_at: return True
+    try:
+        next_dt = datetime.datetime.strptime(next_at, "%Y-%m-%d %H:%M").replace(tzinfo=KST)
+    except: return True
+    # nextCrawlAt은 cron 눈금에 맞춰져 있으나, 예전 상태 파일이나 --loop로 기록된 값도
+    # 가장 가까운 눈금에서 실행되도록 cron 주기의 절반만큼 여유를 둠
+    return now + datetime.timedelta(minutes=CRON_MINUTES / 2) >= next_dt
+
+def main():
+    ap = argparse.ArgumentParser(description="KOBIS 실시간 예매율 수집")
+    ap.add_argument("--cron", action="store_true", help="nextCrawlAt 전이면 크롤링하지 않고 종료 (짧은 주기 cron용)")
+    ap.add_argument("--loop", action="store_true", help="상태 파일의 간격대로 계속 실행")
+    args = ap.parse_args()
+
+    if args.loop:
+        try:
+            while True:
+                state = update_realtime()
+                time.sleep(state.get("interval", MAX_INTERVAL) * 60)
+        except KeyboardInterrupt:
+            print("Stopped.")
+        return
+
+    state = load_json(STATE_FILE)
+    if args.cron and not is_due(state, datetime.datetime.now(KST)):
+        print(f"💤 Not due yet (next: {state.get('nextCrawlAt')} KST)")
+        return
 
-if __name__ == "__main__":
     update_realtime()
+
+if __name__ == "__main__":
+    main()